@@ -1,10 +1,15 @@
+import asyncio
+import atexit
+import contextlib
 import enum
+import itertools
+import mmap
 import os
 import threading
+import time
 import uuid
-from datetime import datetime
-from time import sleep
-from typing import List
+from concurrent.futures import Future
+from typing import Coroutine, Dict, Iterator, List, Tuple
 
 import typer
 from click_shell import make_click_shell
@@ -23,10 +28,6 @@ class ContentType(str, enum.Enum):
     STRING = "string"
 
 
-from typing import Any
-from datetime import datetime
-from paho.mqtt.client import Client
-
 class Publisher:
     """
     A class representing a MQTT publisher.
@@ -41,17 +42,37 @@ class Publisher:
         The MQTT client used by the publisher.
     _stop : bool
         A flag indicating whether the publisher should stop publishing messages.
-    _created_at : datetime
-        The datetime when the publisher was created.
+    _created_at : float
+        The monotonic clock reading when the publisher was created.
     _published_messages : int
         The number of messages published by the publisher.
+    _counter : itertools.count
+        The counter that numbers each published message.
+    _publish_fn : Callable
+        The bound publish method of the MQTT client.
+    _task : Future | None
+        The handle of the publishing coroutine scheduled for the publisher.
 
     Methods:
     --------
-    publish(payload: str) -> None
+    publish(payload: str | bytes) -> None
         Publishes a message to the topic.
+    publish_batch(payloads: List[str | bytes]) -> None
+        Publishes a batch of messages to the topic.
     """
 
+    __slots__ = (
+        "_name",
+        "_topic",
+        "_mqtt_client",
+        "_publish_fn",
+        "_stop",
+        "_created_at",
+        "_published_messages",
+        "_counter",
+        "_task",
+    )
+
     def __init__(self, name: str, topic: str, mqtt_client: Client) -> None:
         """
         Initializes a new instance of the Publisher class.
@@ -68,21 +89,40 @@ class Publisher:
         self._name = name
         self._topic = topic
         self._mqtt_client = mqtt_client
+        self._publish_fn = mqtt_client.publish
         self._stop = False
-        self._created_at = datetime.now()
+        self._created_at = time.monotonic()
         self._published_messages = 0
+        self._counter = itertools.count(1)
+        self._task: Future | None = None
 
-    def publish(self, payload: str) -> None:
+    def publish(self, payload: str | bytes) -> None:
         """
         Publishes a message to the topic.
 
         Parameters:
         -----------
-        payload : str
-            The message to publish.
+        payload : str | bytes
+            The message to publish. Bytes are sent as-is, without encoding.
         """
-        self._mqtt_client.publish(self.topic, payload)
-        self._published_messages += 1
+        self._publish_fn(self._topic, payload)
+        self._published_messages = next(self._counter)
+
+    def publish_batch(self, payloads: List[str | bytes]) -> None:
+        """
+        Publishes a batch of messages to the topic in one pass.
+
+        Parameters:
+        -----------
+        payloads : List[str | bytes]
+            The messages to publish, in order.
+        """
+        publish = self._publish_fn
+        topic = self._topic
+        counter = self._counter
+        for payload in payloads:
+            publish(topic, payload)
+            self._published_messages = next(counter)
 
     @property
     def name(self) -> str:
@@ -106,11 +146,11 @@ class Publisher:
         return self._mqtt_client
 
     @property
-    def lifetime(self) -> Any:
+    def lifetime(self) -> float:
         """
-        Gets the lifetime of the publisher.
+        Gets the lifetime of the publisher in seconds.
         """
-        return datetime.now() - self._created_at
+        return time.monotonic() - self._created_at
 
     @property
     def published_messages(self) -> int:
@@ -127,7 +167,12 @@ class Toolkit:
         self._password = str()
         self._client_id = str()
         self._client: Client = None  # type: ignore
-        self._publishers: List[Publisher] = []
+        self._publishers: Dict[str, Publisher] = {}
+        self._pool_lock = threading.Lock()
+        self._client_pool: Dict[Tuple[str, int, str], List[Client]] = {}
+        self._leased_clients: Dict[Client, Tuple[str, int, str]] = {}
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread: threading.Thread | None = None
 
     def connect(
         self,
@@ -157,6 +202,61 @@ class Toolkit:
             self.client.connect(host, port)
         except Exception as e:
             raise Exception(f"{e}\nFailed to connect to the MQTT broker.")
+        self.client.loop_start()
+
+    def acquire_client(self) -> Client:
+        """Lease a dedicated MQTT client from the connection pool.
+
+        Pooled clients are keyed by (host, port, username) and run their own
+        network loop. The pool size is read from MQTT_POOL_SIZE. When the
+        pool is disabled or exhausted, the shared client is returned instead.
+
+        Returns:
+            Client: The leased MQTT client.
+
+        Raises:
+            Exception: If MQTT_POOL_SIZE is not an integer, or a new pooled
+                client fails to connect.
+        """
+        try:
+            pool_size = int(os.getenv("MQTT_POOL_SIZE", "0"))
+        except ValueError:
+            raise Exception("MQTT_POOL_SIZE must be an integer.")
+        key = (self.host, self.port, self.username)
+        with self._pool_lock:
+            free = self._client_pool.setdefault(key, [])
+            while free:
+                client = free.pop()
+                if client.is_connected():
+                    self._leased_clients[client] = key
+                    return client
+                # Pooled clients do not reconnect; drop the dead connection.
+                client.loop_stop()
+            leased = sum(1 for k in self._leased_clients.values() if k == key)
+            if leased >= pool_size:
+                return self.client
+            client = Client(
+                f"{self.client_id}-{uuid.uuid4().int}", reconnect_on_failure=False
+            )
+            client.username_pw_set(self.username, self.password)
+            try:
+                client.connect(self.host, self.port)
+            except Exception as e:
+                raise Exception(f"{e}\nFailed to connect a pooled MQTT client.")
+            client.loop_start()
+            self._leased_clients[client] = key
+            return client
+
+    def release_client(self, client: Client):
+        """Return a leased MQTT client to the connection pool.
+
+        Args:
+            client (Client): The client returned by acquire_client.
+        """
+        with self._pool_lock:
+            key = self._leased_clients.pop(client, None)
+            if key is not None:
+                self._client_pool.setdefault(key, []).append(client)
 
     def createPublisher(self, name: str | None, topic: str):
         """Create a publisher.
@@ -166,25 +266,88 @@ class Toolkit:
             topic (str): The topic to publish to.
 
         Raises:
-            Exception: If the publisher name already exists.
+            Exception: If the publisher name already exists, or a pooled
+                client fails to connect.
         """
-        publisher = Publisher(name or str(uuid.uuid4().int), topic, self.client)
-        if publisher.name in [p.name for p in self.publishers]:
+        name = name or str(uuid.uuid4().int)
+        if name in self.publishers:
             raise Exception("The publisher name already exists.")
-        self.publishers.append(publisher)
+        publisher = Publisher(name, topic, self.acquire_client())
+        self.publishers[name] = publisher
         return publisher
 
+    def runPublisher(self, publisher: Publisher, routine: Coroutine):
+        """Schedule a publishing coroutine on the toolkit's event loop.
+
+        All publishers share one event loop, hosted on a background thread
+        that is started on first use. If the coroutine fails, the error is
+        printed and the publisher is deleted.
+
+        Args:
+            publisher (Publisher): The publisher the coroutine publishes for.
+            routine (Coroutine): The publishing coroutine.
+        """
+        if self._loop_thread is None:
+            if self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever, daemon=True
+            )
+            self._loop_thread.start()
+        publisher._task = asyncio.run_coroutine_threadsafe(routine, self._loop)
+
+        def _report(task: Future):
+            if task.cancelled() or task.exception() is None:
+                return
+            print(f"[bold red] {task.exception()} [/bold red]")
+            if not publisher._stop:
+                self.deletePublisher(publisher.name)
+
+        publisher._task.add_done_callback(_report)
+
     def deletePublisher(self, name: str):
-        """Delete a publisher thread.
+        """Delete a publisher and cancel its publishing coroutine.
+
+        The publisher is unregistered before it is flagged as stopped, so a
+        stopped publisher is never looked up by name again.
 
         Args:
             name (str): The name of the publisher to delete.
         """
-        for publisher in self.publishers:
-            if publisher.name == name:
-                publisher._stop = True
-                self.publishers.remove(publisher)
-                break
+        publisher = self.publishers.pop(name, None)
+        if publisher is None:
+            return
+        publisher._stop = True
+        if publisher._task is not None:
+            publisher._task.cancel()
+        self.release_client(publisher.mqtt_client)
+
+    def close(self):
+        """Stop all publishers and disconnect every MQTT client.
+
+        Deletes the publishers, disconnects the pooled and shared clients,
+        stops their network loops and shuts down the publishing event loop.
+        Safe to call more than once.
+        """
+        for name in tuple(self.publishers):
+            self.deletePublisher(name)
+        with self._pool_lock:
+            clients = [
+                client for free in self._client_pool.values() for client in free
+            ]
+            self._client_pool.clear()
+        if self._client is not None:
+            clients.append(self._client)
+            self._client = None  # type: ignore
+        for client in clients:
+            client.disconnect()
+            client.loop_stop()
+        if self._loop_thread is not None:
+            # Stop one iteration later, so the cancelled coroutines can finish.
+            self._loop.call_soon_threadsafe(self._loop.call_soon, self._loop.stop)
+            self._loop_thread.join()
+            self._loop_thread = None
+            self._loop.close()
 
     @property
     def host(self):
@@ -218,17 +381,41 @@ class Toolkit:
 
     @property
     def publishers(self):
-        """The list of publishers."""
+        """The publishers, keyed by name."""
         return self._publishers
 
 
+# Upper bound on the time span covered by one batch of file lines; at short
+# periods several lines are sent per wake-up, at long periods one at a time.
+BATCH_WINDOW = 0.05
+MAX_BATCH_SIZE = 32
+
+
+def read_lines(path: str) -> Iterator[bytes]:
+    """Lazily yield the lines of a file through a read-only memory map.
+
+    Args:
+        path (str): The path of the file to read.
+
+    Yields:
+        bytes: The next line of the file, including its line ending.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter(mapped.readline, b"")
+
+
 app = typer.Typer()
-publisher = typer.Typer()
-app.add_typer(publisher, name="publisher")
+publisher_app = typer.Typer()
+app.add_typer(publisher_app, name="publisher")
 toolkit = Toolkit()
+atexit.register(toolkit.close)
+console = Console()
 
 
-@publisher.command("create")
+@publisher_app.command("create")
 def create(
     name: Annotated[str, typer.Argument(help="The name of this publish thread.")],
     topic: Annotated[str, typer.Argument(help="The name of the topic.")],
@@ -258,58 +445,78 @@ def create(
 
     if content_type == ContentType.FILE:
 
-        def _publishing():
-            for line in open(payload, "r").readlines():
-                if publisher._stop:
-                    print(
-                        f"[bold yellow] Publisher {publisher.name} interrupted. [/bold yellow]"
-                    )
-                    break
-                sleep(period)
-                publisher.publish(line)
-            print(f"[bold green] Publisher {publisher.name} finished. [/bold green]")
-            toolkit.publishers.remove(publisher)
+        batch_size = (
+            max(1, min(MAX_BATCH_SIZE, int(BATCH_WINDOW / period)))
+            if period > 0
+            else MAX_BATCH_SIZE
+        )
 
-        publisher_thread = threading.Thread(target=_publishing, daemon=True)
-        publisher_thread.start()
+        async def _publishing():
+            with contextlib.closing(
+                read_lines(payload)
+            ) as lines, contextlib.suppress(asyncio.CancelledError):
+                loop = asyncio.get_running_loop()
+                publish_batch = publisher.publish_batch
+                deadline = loop.time()
+                while not publisher._stop and (
+                    batch := [*itertools.islice(lines, batch_size)]
+                ):
+                    deadline += period * len(batch)
+                    await asyncio.sleep(max(0, deadline - loop.time()))
+                    publish_batch(batch)
+            if publisher._stop:
+                # Already popped by deletePublisher; the name may be reused.
+                print(
+                    f"[bold yellow] Publisher {publisher.name} interrupted. [/bold yellow]"
+                )
+            else:
+                toolkit.deletePublisher(publisher.name)
+            print(f"[bold green] Publisher {publisher.name} finished. [/bold green]")
 
+        toolkit.runPublisher(publisher, _publishing())
         return
 
     if content_type == ContentType.STRING:
 
-        def _publishing():
-            while True:
-                if publisher._stop:
-                    break
-                sleep(period)
-                publisher.publish(payload)
+        async def _publishing():
+            with contextlib.suppress(asyncio.CancelledError):
+                loop = asyncio.get_running_loop()
+                publish = publisher.publish
+                payload_bytes = payload.encode("utf-8")
+                deadline = loop.time()
+                while not publisher._stop:
+                    deadline += period
+                    await asyncio.sleep(max(0, deadline - loop.time()))
+                    publish(payload_bytes)
             print(f"[bold yellow] Publisher {publisher.name} stopped. [/bold yellow]")
 
-        publisher_thread = threading.Thread(target=_publishing, daemon=True)
-        publisher_thread.start()
+        toolkit.runPublisher(publisher, _publishing())
         return
 
 
-@publisher.command("list")
+@publisher_app.command("list")
 def list():
     """
     List all the publishers.
 
     This function prints a table of all the publishers in the toolkit, including their name, topic, lifetime, and number of sent messages.
     """
-    table = Table("Name", "Topic", "Life", "Sent Messages", title="Publishers")
-    console = Console()
-    for publisher in toolkit.publishers:
-        table.add_row(
+    rows = [
+        (
             publisher.name,
             publisher.topic,
-            str(publisher.lifetime.seconds),
+            str(int(publisher.lifetime)),
             str(publisher.published_messages),
         )
+        for publisher in tuple(toolkit.publishers.values())
+    ]
+    table = Table("Name", "Topic", "Life", "Sent Messages", title="Publishers")
+    for row in rows:
+        table.add_row(*row)
     console.print(table)
 
 
-@publisher.command("delete")
+@publisher_app.command("delete")
 def delete(
     name: Annotated[str, typer.Argument(help="The name of the publisher thread.")]
 ):
@@ -327,6 +534,21 @@ def delete(
     toolkit.deletePublisher(name)
 
 
+# The connection settings read from the environment, in connect() argument
+# order, with the label and options used to prompt for any that are missing.
+ENV_SPECS: List[Tuple[str, str, Dict[str, bool]]] = [
+    ("MQTT_HOST", "MQTT Host", {}),
+    ("MQTT_PORT", "MQTT Port", {}),
+    ("MQTT_USERNAME", "MQTT Username", {}),
+    (
+        "MQTT_PASSWORD",
+        "MQTT Password",
+        {"hide_input": True, "confirmation_prompt": True},
+    ),
+    ("MQTT_CLIENT_ID", "MQTT Client ID", {}),
+]
+
+
 @app.callback(invoke_without_command=True)
 def launch(ctx: Context):
     """
@@ -339,41 +561,20 @@ def launch(ctx: Context):
         None
     """
     while True:
-        host = os.getenv("MQTT_HOST")
-        if host is None:
-            host = typer.prompt("MQTT Host")
-            os.environ["MQTT_HOST"] = host
-
-        port = os.getenv("MQTT_PORT")
-        if port is None:
-            port = typer.prompt("MQTT Port")
-            os.environ["MQTT_PORT"] = port
-
-        username = os.getenv("MQTT_USERNAME")
-        if username is None:
-            username = typer.prompt("MQTT Username")
-            os.environ["MQTT_USERNAME"] = username
-
-        password = os.getenv("MQTT_PASSWORD")
-        if password is None:
-            password = typer.prompt("MQTT Password", hide_input=True, confirmation_prompt=True)
-            os.environ["MQTT_PASSWORD"] = password
-
-        client_id = os.getenv("MQTT_CLIENT_ID")
-        if client_id is None:
-            client_id = typer.prompt("MQTT Client ID")
-            os.environ["MQTT_CLIENT_ID"] = client_id
+        for variable, label, prompt_options in ENV_SPECS:
+            if variable not in os.environ:
+                os.environ[variable] = typer.prompt(label, **prompt_options)
+        host, port, username, password, client_id = (
+            os.environ[variable] for variable, _, _ in ENV_SPECS
+        )
 
         try:
             toolkit.connect(host, int(port), username, password, client_id)
             print(f"[bold green] Connected to MQTT Broker {host}:{port} [/bold green]")
             break
         except Exception as e:
-            os.environ.pop("MQTT_HOST")
-            os.environ.pop("MQTT_PORT")
-            os.environ.pop("MQTT_USERNAME")
-            os.environ.pop("MQTT_PASSWORD")
-            os.environ.pop("MQTT_CLIENT_ID")
+            for variable, _, _ in ENV_SPECS:
+                os.environ.pop(variable, None)
             print(f"[bold red] {e} [/bold red]")
 
     shell = make_click_shell(ctx, prompt="MQTT Injector>")